@@ -1,12 +1,21 @@
 import requests
-import json
+import orjson
 import time
 from datetime import datetime
 import os
 import openai
 import uuid
+import random
+import hashlib
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from flask import Flask, jsonify, Response, stream_template
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import Flask, request, Response, stream_template
 from flask_cors import CORS
 
 # Load environment variables from .env file
@@ -29,9 +38,80 @@ headers = {
     "x-user": "9"
 }
 
+# Size the connection pool for concurrent upstream calls and retry transient gateway errors;
+# raise_on_status=False hands the final error response back to the caller as before
+adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], raise_on_status=False)
+)
+session.mount('https://', adapter)
+session.mount('http://', adapter)
+session.headers.update(headers)
+
 # Base URL
 base_url = "https://www.gradientcyber.net/quorum/api"
 
+# Upstream survey endpoints, formatted with the survey ID
+TASK_URL_TEMPLATE = f"{base_url}/surveyTasks?surveyId={{}}"
+META_URL_TEMPLATE = f"{base_url}/survey?surveyId={{}}"
+
+# Maximum number of concurrent OpenAI requests across all surveys (keeps us under rate limits)
+MAX_LLM_WORKERS = 16
+
+# Maximum number of concurrent upstream survey API requests
+MAX_FETCH_WORKERS = 16
+
+# Worker pools shared by all requests so in-flight surveys don't each spin up their own threads
+fetch_executor = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix="survey-fetch")
+llm_executor = ThreadPoolExecutor(max_workers=MAX_LLM_WORKERS, thread_name_prefix="openai")
+
+# Transient OpenAI errors worth retrying (timeouts are a subclass of APIConnectionError)
+RETRYABLE_OPENAI_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries expire after ttl seconds.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for the key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Cache a value, evicting the least recently used entries beyond maxsize."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+# In-process cache of parsed GPT recommendations keyed by prompt hash
+LLM_CACHE_MAX_ENTRIES = 1024
+LLM_CACHE_TTL = 3600
+llm_cache = TTLCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL)
+
+# Replay cache of completed survey event streams keyed by survey ID and a hash
+# of the fetched survey, so edits upstream miss the cache. It lives in each
+# worker process, so ?refresh=1 only replaces the entry in the worker serving it
+SURVEY_CACHE_MAX_ENTRIES = 256
+SURVEY_CACHE_TTL = int(os.getenv('SURVEY_CACHE_TTL', '300'))
+survey_events_cache = TTLCache(SURVEY_CACHE_MAX_ENTRIES, SURVEY_CACHE_TTL)
+
 # Define the system instruction as a constant
 SYSTEM_INSTRUCTION = """NIST 2.0 AI Recommendation Engine (Simplified Output Version)
 
@@ -114,169 +194,309 @@ Return a single JSON object per subcategory with only the following fields:
 
 ---
 
+## RECOMMENDATION GUIDELINES
+
+When generating a subcategory recommendation, ensure:
+1. All recommendations are actionable and specific
+2. MXDR services are mapped according to the provided pricing tiers
+3. Implementation timelines are realistic
+4. Business rationale is compelling and specific
+5. Technical recommendations align with NIST examples
+6. ROI calculations use industry-standard metrics
+7. Language is professional but accessible to executives
+8. Recommendations specifically address the current maturity level described in the Score Description.
+
+---
+
 Your goal is to guide strategic remediation aligned to NIST CSF and promote MXDR capabilities where applicable. Focus on value, feasibility, and measurable improvement.
 """
 
+# Descriptive text for each score level, indexed by score (0-5)
+SCORE_RESPONSES = (
+    "Incomplete. No formal practices exist.",
+    "Ad hoc. Unstructured, reactive practices exist.",
+    "Developing. Some policies and controls exist, but they are incomplete, inconsistent, or not widely followed.",
+    "Managed. Policies and processes are documented, followed, and managed across teams, but effectiveness is not consistently measured.",
+    "Quantified. Policies and controls are regularly measured and continuously improved. The organization has a structured cybersecurity approach.",
+    "Optimized. Cybersecurity is fully integrated into business operations, continuously improving, and leveraging automation and advanced security practices."
+)
+
+# Priority labels, from most to least urgent
+PRIORITY_LABELS = ("Critical", "High", "Medium", "Low")
+
+# Upper bounds (inclusive) of each priority for a raw score (0-5) and a percentage score (0-100)
+PRIORITY_SCORE_CUTOFFS = (1, 2, 3)
+PRIORITY_PERCENTAGE_CUTOFFS = (25, 50, 75)
+
+# Average percentage score thresholds for the maturity buckets below
+MATURITY_THRESHOLDS = (26, 51, 76)
+
+# Overall maturity level for each bucket
+MATURITY_LEVELS = ("Initial", "Basic", "Intermediate", "Advanced")
+
+# Summary insight for each bucket
+MATURITY_INSIGHTS = (
+    "Organization lacks comprehensive cybersecurity implementation across all categories.",
+    "Organization has basic cybersecurity measures in place but requires significant improvements.",
+    "Organization shows moderate cybersecurity implementation with some areas needing improvement.",
+    "Organization demonstrates strong cybersecurity practices across all categories."
+)
+
+# Category recommendations keyed by (category, score)
+CATEGORY_RECOMMENDATIONS = {
+    ("govern", 0): "Implement basic governance framework and policies",
+    ("govern", 1): "Develop formal governance documentation and procedures",
+    ("govern", 2): "Strengthen and formalize existing governance practices",
+    ("govern", 3): "Optimize governance processes and ensure organization-wide adoption",
+    ("identify", 0): "Establish basic asset management and risk assessment processes",
+    ("identify", 1): "Develop comprehensive asset inventory and risk management program",
+    ("identify", 2): "Enhance risk assessment and asset management practices",
+    ("identify", 3): "Implement advanced risk management and asset tracking systems",
+    ("protect", 0): "Implement basic protective measures and controls",
+    ("protect", 1): "Develop comprehensive protection strategies",
+    ("protect", 2): "Enhance existing protection mechanisms",
+    ("protect", 3): "Optimize protection systems and controls",
+    ("detect", 0): "Establish basic detection capabilities and monitoring",
+    ("detect", 1): "Develop comprehensive detection systems",
+    ("detect", 2): "Enhance detection and monitoring capabilities",
+    ("detect", 3): "Implement advanced detection and analytics",
+    ("respond", 0): "Create basic incident response procedures",
+    ("respond", 1): "Develop formal incident response plan",
+    ("respond", 2): "Enhance incident response capabilities",
+    ("respond", 3): "Implement advanced incident response systems",
+    ("recover", 0): "Establish basic recovery procedures",
+    ("recover", 1): "Develop comprehensive recovery plans",
+    ("recover", 2): "Enhance recovery capabilities",
+    ("recover", 3): "Implement advanced recovery systems"
+}
+
+# Category rationales keyed by (category, score)
+CATEGORY_RATIONALES = {
+    ("govern", 0): "No governance framework in place, creating significant compliance and operational risks",
+    ("govern", 1): "Basic governance exists but needs formalization and broader implementation",
+    ("govern", 2): "Governance practices are partially implemented but need strengthening",
+    ("govern", 3): "Strong governance foundation exists, focus on optimization and continuous improvement",
+    ("identify", 0): "Lack of asset management and risk assessment creates blind spots in security posture",
+    ("identify", 1): "Basic identification processes exist but need expansion and formalization",
+    ("identify", 2): "Moderate identification capabilities need enhancement for better coverage",
+    ("identify", 3): "Advanced identification systems in place, focus on optimization",
+    ("protect", 0): "No protective measures in place, leaving systems vulnerable to attacks",
+    ("protect", 1): "Basic protection exists but needs expansion and formalization",
+    ("protect", 2): "Moderate protection capabilities need enhancement",
+    ("protect", 3): "Strong protection systems in place, focus on optimization",
+    ("detect", 0): "No detection capabilities, unable to identify security incidents",
+    ("detect", 1): "Basic detection systems exist but need improvement",
+    ("detect", 2): "Moderate detection capabilities need enhancement",
+    ("detect", 3): "Advanced detection systems in place, focus on optimization",
+    ("respond", 0): "No incident response procedures, unable to handle security incidents effectively",
+    ("respond", 1): "Basic response procedures exist but need formalization",
+    ("respond", 2): "Moderate response capabilities need enhancement",
+    ("respond", 3): "Advanced response systems in place, focus on optimization",
+    ("recover", 0): "No recovery procedures, unable to restore operations after incidents",
+    ("recover", 1): "Basic recovery procedures exist but need formalization",
+    ("recover", 2): "Moderate recovery capabilities need enhancement",
+    ("recover", 3): "Advanced recovery systems in place, focus on optimization"
+}
+
+# Supporting resources keyed by category
+CATEGORY_RESOURCES = {
+    "govern": (
+        "NIST Governance Framework Template",
+        "Policy Implementation Guide",
+        "Governance Maturity Assessment Tool"
+    ),
+    "identify": (
+        "Asset Management Framework",
+        "Risk Assessment Methodology Guide",
+        "Critical Asset Identification Template"
+    ),
+    "protect": (
+        "Security Control Implementation Guide",
+        "Access Control Framework",
+        "Data Protection Best Practices"
+    ),
+    "detect": (
+        "SIEM Implementation Guide",
+        "Log Analysis Best Practices",
+        "Threat Detection Framework"
+    ),
+    "respond": (
+        "Incident Response Plan Template",
+        "Response Playbook",
+        "Incident Management Guide"
+    ),
+    "recover": (
+        "Business Continuity Planning Guide",
+        "Recovery Procedures Framework",
+        "Disaster Recovery Template"
+    )
+}
+
+# Control-specific recommendations keyed by NIST control ID
+CONTROL_RECOMMENDATIONS = {
+    "GV.OC-01": {
+        "recommendation": "Establish formal governance framework aligned with organizational mission",
+        "rationale": "Governance framework ensures cybersecurity aligns with business objectives",
+        "resources": ("NIST Governance Framework Template", "Mission Alignment Guide")
+    },
+    "PR.AA-01": {
+        "recommendation": "Implement comprehensive identity management system",
+        "rationale": "Strong identity management is fundamental to access control",
+        "resources": ("Identity Management Best Practices", "IAM Implementation Guide")
+    },
+    "DE.AE-02": {
+        "recommendation": "Deploy SIEM platform with threat intelligence integration",
+        "rationale": "Advanced event analysis requires automated tools and threat intelligence",
+        "resources": ("SIEM Implementation Guide", "Threat Intelligence Integration Guide")
+    },
+    "RS.MA-01": {
+        "recommendation": "Develop formal incident response procedures and playbooks",
+        "rationale": "Structured response procedures ensure effective incident handling",
+        "resources": ("Incident Response Plan Template", "Response Playbook Guide")
+    }
+}
+
 # Helper Functions
+@lru_cache(maxsize=None)
+def get_openai_client():
+    """
+    Return the shared OpenAI client, creating it on first use.
+
+    Reusing one client keeps its HTTP connection pool warm across calls. It is
+    created lazily so the app can still start when OPENAI_API_KEY is missing.
+    """
+    return openai.OpenAI()
+
+def get_prompt_cache_key(prompt):
+    """
+    Return the content-addressed cache key for a prompt.
+    """
+    return hashlib.sha256((SYSTEM_INSTRUCTION + prompt).encode()).hexdigest()
+
+def get_cached_recommendation(cache_key):
+    """
+    Return a copy of the cached recommendation for the key, or None on a miss.
+    """
+    recommendation = llm_cache.get(cache_key)
+    if recommendation is None:
+        return None
+    # Callers add per-request metadata, so never hand out the cached dict itself
+    return dict(recommendation)
+
+def store_cached_recommendation(cache_key, recommendation):
+    """
+    Cache a copy of a parsed recommendation for LLM_CACHE_TTL seconds.
+    """
+    llm_cache.set(cache_key, dict(recommendation))
+
+def get_survey_cache_key(survey_id, payload):
+    """
+    Return the replay cache key for a survey, versioned by its fetched tasks and scores.
+    """
+    content = orjson.dumps([payload["tasks"], payload["category_scores"]], option=orjson.OPT_SORT_KEYS)
+    return survey_id, hashlib.sha256(content).hexdigest()
+
+def fetch_survey_responses(task_url, meta_url):
+    """
+    Fetch the task and meta responses for a survey concurrently.
+    """
+    task_future = fetch_executor.submit(session.get, task_url, timeout=30)
+    meta_future = fetch_executor.submit(session.get, meta_url, timeout=30)
+    return task_future.result(), meta_future.result()
+
+def fetch_survey_payload(survey_id):
+    """
+    Fetch and parse the task and meta data for a survey.
+
+    Returns a dict with both request URLs and HTTP status codes, the tasks
+    list, the category scores and any warnings raised while parsing the responses.
+    """
+    task_url = TASK_URL_TEMPLATE.format(survey_id)
+    meta_url = META_URL_TEMPLATE.format(survey_id)
+
+    # Send both requests concurrently using session
+    task_resp, meta_resp = fetch_survey_responses(task_url, meta_url)
+
+    task_data, meta_data = {}, {}
+    warnings = []
+
+    # Handle meta response
+    if meta_resp.status_code == 200 and meta_resp.content:
+        try:
+            meta_data = orjson.loads(meta_resp.content)
+            if not isinstance(meta_data, dict):
+                warnings.append("Meta response is not a JSON object")
+                meta_data = {}
+            if isinstance(meta_data.get("scores"), str):
+                try:
+                    meta_data["scores"] = orjson.loads(meta_data["scores"])
+                except orjson.JSONDecodeError:
+                    warnings.append("Could not parse scores data")
+                    meta_data["scores"] = {}
+        except orjson.JSONDecodeError as e:
+            warnings.append(f"Meta JSON error: {str(e)}")
+    else:
+        warnings.append("Empty or non-JSON meta response")
+
+    # Handle task response
+    if task_resp.status_code == 200 and task_resp.content:
+        try:
+            task_data = orjson.loads(task_resp.content)
+        except orjson.JSONDecodeError as e:
+            warnings.append(f"Task JSON error: {str(e)}")
+    else:
+        warnings.append("Empty or non-JSON task response")
+
+    return {
+        "task_url": task_url,
+        "meta_url": meta_url,
+        "task_status": task_resp.status_code,
+        "meta_status": meta_resp.status_code,
+        "tasks": task_data.get("tasks", []) if isinstance(task_data, dict) else [],
+        "category_scores": meta_data.get("scores", {}),
+        "warnings": warnings
+    }
+
+def get_maturity_bucket(percentage_scores):
+    """
+    Return the maturity bucket (0-3) for the average of the percentage scores.
+    """
+    avg_score = sum(percentage_scores.values()) / len(percentage_scores)
+    return bisect_right(MATURITY_THRESHOLDS, avg_score)
+
 def generate_summary_insight(percentage_scores):
     """
     Generate a summary insight based on average percentage score.
     """
     if not percentage_scores:
         return "No scores available to analyze."
-    avg_score = sum(percentage_scores.values()) / len(percentage_scores)
-    if avg_score >= 76:
-        return "Organization demonstrates strong cybersecurity practices across all categories."
-    elif avg_score >= 51:
-        return "Organization shows moderate cybersecurity implementation with some areas needing improvement."
-    elif avg_score >= 26:
-        return "Organization has basic cybersecurity measures in place but requires significant improvements."
-    else:
-        return "Organization lacks comprehensive cybersecurity implementation across all categories."
+    return MATURITY_INSIGHTS[get_maturity_bucket(percentage_scores)]
 
 def determine_priority_by_percentage(percentage_score):
     """
     Determine priority based on percentage performance (0-100%)
+
+    0-25% is Critical, 26-50% High, 51-75% Medium and 76-100% Low.
     """
-    if percentage_score == 0:
-        return "Critical"           # 0% - No implementation
-    elif percentage_score <= 25:
-        return "Critical"           # 1-25% - Minimal implementation  
-    elif percentage_score <= 50:
-        return "High"              # 26-50% - Basic implementation
-    elif percentage_score <= 75:
-        return "Medium"            # 51-75% - Good implementation
-    else:
-        return "Low"               # 76-100% - Excellent (optimization focus)
+    return PRIORITY_LABELS[bisect_left(PRIORITY_PERCENTAGE_CUTOFFS, percentage_score)]
 
 def generate_recommendation(category, score):
     """
     Generate specific recommendations based on category and score.
     """
-    recommendations = {
-        "govern": {
-            0: "Implement basic governance framework and policies",
-            1: "Develop formal governance documentation and procedures",
-            2: "Strengthen and formalize existing governance practices",
-            3: "Optimize governance processes and ensure organization-wide adoption"
-        },
-        "identify": {
-            0: "Establish basic asset management and risk assessment processes",
-            1: "Develop comprehensive asset inventory and risk management program",
-            2: "Enhance risk assessment and asset management practices",
-            3: "Implement advanced risk management and asset tracking systems"
-        },
-        "protect": {
-            0: "Implement basic protective measures and controls",
-            1: "Develop comprehensive protection strategies",
-            2: "Enhance existing protection mechanisms",
-            3: "Optimize protection systems and controls"
-        },
-        "detect": {
-            0: "Establish basic detection capabilities and monitoring",
-            1: "Develop comprehensive detection systems",
-            2: "Enhance detection and monitoring capabilities",
-            3: "Implement advanced detection and analytics"
-        },
-        "respond": {
-            0: "Create basic incident response procedures",
-            1: "Develop formal incident response plan",
-            2: "Enhance incident response capabilities",
-            3: "Implement advanced incident response systems"
-        },
-        "recover": {
-            0: "Establish basic recovery procedures",
-            1: "Develop comprehensive recovery plans",
-            2: "Enhance recovery capabilities",
-            3: "Implement advanced recovery systems"
-        }
-    }
-    
-    return recommendations.get(category, {}).get(score, "Review and improve current practices")
+    return CATEGORY_RECOMMENDATIONS.get((category, score), "Review and improve current practices")
 
 def generate_rationale(category, score):
     """
     Generate rationale for recommendations based on category and score.
     """
-    rationales = {
-        "govern": {
-            0: "No governance framework in place, creating significant compliance and operational risks",
-            1: "Basic governance exists but needs formalization and broader implementation",
-            2: "Governance practices are partially implemented but need strengthening",
-            3: "Strong governance foundation exists, focus on optimization and continuous improvement"
-        },
-        "identify": {
-            0: "Lack of asset management and risk assessment creates blind spots in security posture",
-            1: "Basic identification processes exist but need expansion and formalization",
-            2: "Moderate identification capabilities need enhancement for better coverage",
-            3: "Advanced identification systems in place, focus on optimization"
-        },
-        "protect": {
-            0: "No protective measures in place, leaving systems vulnerable to attacks",
-            1: "Basic protection exists but needs expansion and formalization",
-            2: "Moderate protection capabilities need enhancement",
-            3: "Strong protection systems in place, focus on optimization"
-        },
-        "detect": {
-            0: "No detection capabilities, unable to identify security incidents",
-            1: "Basic detection systems exist but need improvement",
-            2: "Moderate detection capabilities need enhancement",
-            3: "Advanced detection systems in place, focus on optimization"
-        },
-        "respond": {
-            0: "No incident response procedures, unable to handle security incidents effectively",
-            1: "Basic response procedures exist but need formalization",
-            2: "Moderate response capabilities need enhancement",
-            3: "Advanced response systems in place, focus on optimization"
-        },
-        "recover": {
-            0: "No recovery procedures, unable to restore operations after incidents",
-            1: "Basic recovery procedures exist but need formalization",
-            2: "Moderate recovery capabilities need enhancement",
-            3: "Advanced recovery systems in place, focus on optimization"
-        }
-    }
-    
-    return rationales.get(category, {}).get(score, "Review current practices and identify improvement areas")
+    return CATEGORY_RATIONALES.get((category, score), "Review current practices and identify improvement areas")
 
 def get_supporting_resources(category):
     """
     Get relevant supporting resources for a category.
     """
-    resources = {
-        "govern": [
-            "NIST Governance Framework Template",
-            "Policy Implementation Guide",
-            "Governance Maturity Assessment Tool"
-        ],
-        "identify": [
-            "Asset Management Framework",
-            "Risk Assessment Methodology Guide",
-            "Critical Asset Identification Template"
-        ],
-        "protect": [
-            "Security Control Implementation Guide",
-            "Access Control Framework",
-            "Data Protection Best Practices"
-        ],
-        "detect": [
-            "SIEM Implementation Guide",
-            "Log Analysis Best Practices",
-            "Threat Detection Framework"
-        ],
-        "respond": [
-            "Incident Response Plan Template",
-            "Response Playbook",
-            "Incident Management Guide"
-        ],
-        "recover": [
-            "Business Continuity Planning Guide",
-            "Recovery Procedures Framework",
-            "Disaster Recovery Template"
-        ]
-    }
-    
-    return resources.get(category, ["General cybersecurity best practices guide"])
+    return list(CATEGORY_RESOURCES.get(category, ("General cybersecurity best practices guide",)))
 
 def generate_next_steps(scores):
     """
@@ -297,38 +517,49 @@ def generate_next_steps(scores):
     
     return next_steps
 
-def analyze_individual_controls(survey_data):
+def iter_low_score_tasks(tasks, null_score=None):
+    """
+    Yield (task, score) for each task scored 0-2, skipping good maturity levels 3-5.
+
+    Tasks without a score are skipped unless null_score is given, in which case
+    they are scored as null_score.
+    """
+    for task in tasks:
+        score = task.get("score")
+        if score is None:
+            if null_score is None:
+                continue
+            score = null_score
+        score = int(score)
+        if score <= 2:
+            yield task, score
+
+def analyze_individual_controls(tasks):
     """
     Analyze individual NIST controls from the tasks array.
     """
     control_recommendations = []
     
-    # Get tasks array
-    tasks = survey_data.get("tasks", {}).get("tasks", [])
-    
-    for task in tasks:
+    # Treat null scores as 0; high-scoring tasks are filtered out before any string work
+    for task, score in iter_low_score_tasks(tasks, null_score=0):
         # Extract control ID from task name
         control_id = extract_control_id(task.get("name", ""))
         if not control_id:
             continue
-            
-        # Get score (treat null as 0)
-        score = task.get("score", 0) or 0
-        score = int(score)
         
-        # Skip recommendation generation for scores 3, 4, 5 (good maturity levels)
-        if score <= 2:
-            # Generate control-specific recommendation
-            recommendation = get_control_recommendation(control_id, score, task)
-            control_recommendations.append(recommendation)
+        # Generate control-specific recommendation
+        recommendation = get_control_recommendation(control_id, score, task)
+        control_recommendations.append(recommendation)
     
     return control_recommendations
 
+@lru_cache(maxsize=4096)
 def extract_control_id(task_name):
     """Extract control ID from task name"""
-    if not task_name or ':' not in task_name:
+    if not task_name:
         return None
-    return task_name.split(':')[0].strip()
+    control_id, separator, _ = task_name.partition(':')
+    return control_id.strip() if separator else None
 
 def get_control_recommendation(control_id, score, task_data):
     """
@@ -344,33 +575,11 @@ def get_control_recommendation(control_id, score, task_data):
         "supporting_resources": []
     }
     
-    # Control-specific recommendations
-    control_recommendations = {
-        "GV.OC-01": {
-            "recommendation": "Establish formal governance framework aligned with organizational mission",
-            "rationale": "Governance framework ensures cybersecurity aligns with business objectives",
-            "resources": ["NIST Governance Framework Template", "Mission Alignment Guide"]
-        },
-        "PR.AA-01": {
-            "recommendation": "Implement comprehensive identity management system",
-            "rationale": "Strong identity management is fundamental to access control",
-            "resources": ["Identity Management Best Practices", "IAM Implementation Guide"]
-        },
-        "DE.AE-02": {
-            "recommendation": "Deploy SIEM platform with threat intelligence integration",
-            "rationale": "Advanced event analysis requires automated tools and threat intelligence",
-            "resources": ["SIEM Implementation Guide", "Threat Intelligence Integration Guide"]
-        },
-        "RS.MA-01": {
-            "recommendation": "Develop formal incident response procedures and playbooks",
-            "rationale": "Structured response procedures ensure effective incident handling",
-            "resources": ["Incident Response Plan Template", "Response Playbook Guide"]
-        }
-    }
-    
     # Get control-specific recommendation if available
-    if control_id in control_recommendations:
-        recommendation.update(control_recommendations[control_id])
+    if control_id in CONTROL_RECOMMENDATIONS:
+        control = CONTROL_RECOMMENDATIONS[control_id]
+        recommendation.update(control)
+        recommendation["resources"] = list(control["resources"])
     else:
         # Generate generic recommendation based on control category
         category = control_id.split('.')[0] if '.' in control_id else ''
@@ -408,7 +617,8 @@ def process_survey_data(survey_data):
         analysis["category_summaries"].append(recommendation)
     
     # Generate control-level recommendations
-    analysis["individual_controls"] = analyze_individual_controls(survey_data)
+    tasks = survey_data.get("tasks", {}).get("tasks", [])
+    analysis["individual_controls"] = analyze_individual_controls(tasks)
     
     # Generate next steps based on both category and control analysis
     analysis["next_steps"] = generate_next_steps(percentage_scores)
@@ -417,69 +627,33 @@ def process_survey_data(survey_data):
 
 def process_survey(survey_id):
    """Process a single survey and generate recommendations"""
-   task_url = f"{base_url}/surveyTasks?surveyId={survey_id}"
-   meta_url = f"{base_url}/survey?surveyId={survey_id}"
    print(f"\n🔄 Processing survey ID: {survey_id}")
-   print(f"📡 Task URL: {task_url}")
-   print(f"📡 Meta URL: {meta_url}")
 
    try:
-       # Send both requests using session
-       task_resp = session.get(task_url, headers=headers, timeout=30)
-       meta_resp = session.get(meta_url, headers=headers, timeout=30)
-
-       print(f"🛰️ Task Status: {task_resp.status_code} | Meta Status: {meta_resp.status_code}")
-
-       task_data, meta_data = {}, {}
-
-       # Handle meta response
-       if meta_resp.status_code == 200 and meta_resp.text.strip():
-           try:
-               meta_data = meta_resp.json()
-               if isinstance(meta_data.get("scores"), str):
-                   try:
-                       meta_data["scores"] = json.loads(meta_data["scores"])
-                   except json.JSONDecodeError:
-                       print(f"⚠️ Could not parse 'scores' for survey {survey_id}")
-                       meta_data["scores"] = {}
-           except json.JSONDecodeError as e:
-               print(f"⚠️ Meta JSON error for survey {survey_id}: {e}")
-       else:
-           print(f"⚠️ Empty or non-JSON meta response for survey {survey_id}")
-
-       # Handle task response
-       if task_resp.status_code == 200 and task_resp.text.strip():
-           try:
-               task_data = task_resp.json()
-           except json.JSONDecodeError as e:
-               print(f"⚠️ Task JSON error for survey {survey_id}: {e}")
-       else:
-           print(f"⚠️ Empty or non-JSON task response for survey {survey_id}")
-
-       # Create survey data
-       survey_data = {
-           "survey_id": survey_id,
-           "meta": meta_data,
-           "tasks": task_data
-       }
+       payload = fetch_survey_payload(survey_id)
+
+       print(f"📡 Task URL: {payload['task_url']}")
+       print(f"📡 Meta URL: {payload['meta_url']}")
+       print(f"🛰️ Task Status: {payload['task_status']} | Meta Status: {payload['meta_status']}")
+       for warning in payload["warnings"]:
+           print(f"⚠️ {warning} (survey {survey_id})")
+
+       tasks = payload["tasks"]
+       category_scores = payload["category_scores"]
 
        # Process the survey data and generate recommendations
-       recommendations = []
-       tasks = survey_data.get("tasks", {}).get("tasks", [])
-       category_scores = survey_data.get("meta", {}).get("scores", {})
-
-       for task in tasks:
-           if task.get("score") is not None:
-               score = int(task.get("score", 0))
-               # Skip recommendation generation for scores 3, 4, 5 (good maturity levels)
-               if score <= 2:
-                   recommendation = generate_subcategory_recommendation(
-                       task,
-                       category_scores,
-                       survey_id
-                   )
-                   if recommendation:
-                       recommendations.append(recommendation)
+       category_scores_json = format_category_scores(category_scores)
+
+       # Skip recommendation generation for scores 3, 4, 5 (good maturity levels)
+       low_score_tasks = list(iter_low_score_tasks(tasks))
+
+       # Generate the subcategory recommendations concurrently, preserving task order
+       futures = [
+           llm_executor.submit(generate_subcategory_recommendation, task, score, category_scores_json, survey_id)
+           for task, score in low_score_tasks
+       ]
+       results = (future.result() for future in futures)
+       recommendations = [recommendation for recommendation in results if recommendation]
 
        # Check if no recommendations were generated (all scores are 3+ indicating good maturity)
        if not recommendations:
@@ -500,12 +674,12 @@ def process_survey(survey_id):
            "recommendations": recommendations
        }
 
-       # Print the raw response
-       print("\n📊 Generated Recommendations:")
-       print(json.dumps(final_output, indent=2))
+       print(f"\n📊 Generated {len(recommendations)} recommendations")
+       # Dumping the full payload is expensive for large surveys, so only do it when asked
+       if os.getenv("DEBUG_DUMP"):
+           print(orjson.dumps(final_output, option=orjson.OPT_INDENT_2).decode())
        
        print(f"✅ Processed: Survey {survey_id} at {datetime.now().strftime('%H:%M:%S')}")
-       time.sleep(0.5)
 
        return final_output
 
@@ -517,39 +691,22 @@ def calculate_overall_maturity(category_scores):
     """Calculate overall maturity level based on category scores"""
     if not category_scores:
         return "Unknown"
-    
-    avg_score = sum(category_scores.values()) / len(category_scores)
-    
-    if avg_score >= 76:
-        return "Advanced"
-    elif avg_score >= 51:
-        return "Intermediate"
-    elif avg_score >= 26:
-        return "Basic"
-    else:
-        return "Initial"
+    return MATURITY_LEVELS[get_maturity_bucket(category_scores)]
 
 def get_score_response_text(score):
     """
     Get the descriptive text for a given score level.
     """
-    score_responses = {
-        0: "Incomplete. No formal practices exist.",
-        1: "Ad hoc. Unstructured, reactive practices exist.",
-        2: "Developing. Some policies and controls exist, but they are incomplete, inconsistent, or not widely followed.",
-        3: "Managed. Policies and processes are documented, followed, and managed across teams, but effectiveness is not consistently measured.",
-        4: "Quantified. Policies and controls are regularly measured and continuously improved. The organization has a structured cybersecurity approach.",
-        5: "Optimized. Cybersecurity is fully integrated into business operations, continuously improving, and leveraging automation and advanced security practices."
-    }
-    return score_responses.get(score, "Unknown score level")
+    if 0 <= score < len(SCORE_RESPONSES):
+        return SCORE_RESPONSES[score]
+    return "Unknown score level"
 
-def generate_subcategory_recommendation(task, category_scores, survey_id):
-    """Generate recommendation for a specific subcategory"""
+def generate_subcategory_recommendation(task, score, category_scores_json, survey_id):
+    """Generate recommendation for a specific subcategory (score is the task's parsed score)"""
     try:
         # Extract task information
         task_id = task.get("id")
         task_name = task.get("name", "")
-        score = int(task.get("score", 0))
         category = task.get("kind", "").split()[0]  # Extract category from kind
         subcategory = task.get("subSystem", "")
         context = task.get("additionalContext", "")
@@ -569,7 +726,7 @@ def generate_subcategory_recommendation(task, category_scores, survey_id):
             subcategory,
             context,
             references,
-            category_scores,
+            category_scores_json,
             score_response_text
         )
         
@@ -596,19 +753,26 @@ def generate_subcategory_recommendation(task, category_scores, survey_id):
         return None
 
 def determine_priority(score):
-    """Determine priority based on score"""
-    if score <= 1:
-        return "Critical"
-    elif score == 2:
-        return "High"
-    elif score == 3:
-        return "Medium"
-    else:
-        return "Low"
+    """Determine priority based on score (0-1 Critical, 2 High, 3 Medium, 4-5 Low)"""
+    return PRIORITY_LABELS[bisect_left(PRIORITY_SCORE_CUTOFFS, score)]
+
+def format_category_scores(category_scores):
+    """Format the category maturity scores for inclusion in a prompt"""
+    return orjson.dumps(category_scores, option=orjson.OPT_INDENT_2).decode()
+
+def prepare_subcategory_prompt(task_name, score, category, subcategory, context, references, category_scores_json, score_response_text):
+    """
+    Prepare the user prompt for a specific subcategory.
 
-def prepare_subcategory_prompt(task_name, score, category, subcategory, context, references, category_scores, score_response_text):
-    """Prepare the prompt for a specific subcategory"""
+    Only the per-task fields belong here; static guidance lives in
+    SYSTEM_INSTRUCTION so every call shares the same cacheable prefix. The
+    survey-wide maturity scores come before the task fields so all calls for
+    one survey also share that part of the prefix.
+    """
     return f"""
+    Current Maturity Scores:
+    {category_scores_json}
+    
     Generate a comprehensive NIST 2.0 recommendation for:
     
     Subcategory: {task_name}
@@ -617,24 +781,11 @@ def prepare_subcategory_prompt(task_name, score, category, subcategory, context,
     Category: {category}
     Subcategory: {subcategory}
     
-    Current Maturity Scores:
-    {json.dumps(category_scores, indent=2)}
-    
     Additional Context from User:
     {context}
     
     References:
     {references}
-    
-    Please provide a recommendation following the specified JSON structure, ensuring:
-    1. All recommendations are actionable and specific
-    2. MXDR services are mapped according to the provided pricing tiers
-    3. Implementation timelines are realistic
-    4. Business rationale is compelling and specific
-    5. Technical recommendations align with NIST examples
-    6. ROI calculations use industry-standard metrics
-    7. Language is professional but accessible to executives
-    8. Recommendations specifically address the current maturity level described in the Score Description.
     """
 
 def generate_positive_assessment_recommendation(category_scores, survey_id):
@@ -645,9 +796,8 @@ def generate_positive_assessment_recommendation(category_scores, survey_id):
         Generate a positive cybersecurity assessment for an organization with strong maturity scores.
         
         Current Maturity Scores:
-        {json.dumps(category_scores, indent=2)}
+        {format_category_scores(category_scores)}
         
-        Survey ID: {survey_id}
         Assessment Context: All cybersecurity controls scored 3 or higher, indicating well-established practices.
         
         Create a "No Recommendations Needed" assessment that:
@@ -687,7 +837,7 @@ def generate_positive_assessment_recommendation(category_scores, survey_id):
             return recommendation
             
     except Exception as e:
-        print(f"Error generating positive assessment: {e}")
+        print(f"Error generating positive assessment for survey {survey_id}: {e}")
         # Fallback to a basic "no recommendations needed" message if LLM fails
         return {
             "subcategory": "OVERALL-ASSESSMENT",
@@ -707,11 +857,17 @@ def generate_positive_assessment_recommendation(category_scores, survey_id):
             "timestamp": datetime.now().isoformat()
         }
 
-def generate_gpt_recommendation(prompt, retries=3, delay=10):
+def generate_gpt_recommendation(prompt, retries=3, base_delay=1, max_delay=30):
     """Generate recommendation using GPT"""
+    # Identical prompts produce the same output at temperature 0, so serve them from cache
+    cache_key = get_prompt_cache_key(prompt)
+    cached = get_cached_recommendation(cache_key)
+    if cached is not None:
+        return cached
+
     for attempt in range(retries):
         try:
-            client = openai.OpenAI()
+            client = get_openai_client()
             response = client.chat.completions.create(
                 model="gpt-4o-mini",  
                 messages=[
@@ -719,24 +875,201 @@ def generate_gpt_recommendation(prompt, retries=3, delay=10):
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0,
-                max_tokens=4000
+                max_tokens=4000,
+                response_format={"type": "json_object"}
             )
             content = response.choices[0].message.content
-            if not content.strip():
-                print("Empty response from model!")
-                return None
-            try:
-                recommendation = json.loads(content)
-                return recommendation
-            except json.JSONDecodeError:
-                print("Model did not return valid JSON:", content)
-                continue
-        except Exception as e:
+        except RETRYABLE_OPENAI_ERRORS as e:
             print(f"Error generating GPT recommendation (attempt {attempt+1}): {e}")
             if attempt < retries - 1:
-                time.sleep(delay)
+                # Exponential backoff with jitter so concurrent workers don't retry in lockstep
+                backoff = min(max_delay, base_delay * 2 ** attempt)
+                time.sleep(random.uniform(backoff / 2, backoff))
+            continue
+        except Exception as e:
+            print(f"Error generating GPT recommendation: {e}")
+            return None
+
+        if not content or not content.strip():
+            print("Empty response from model!")
+            return None
+        try:
+            recommendation = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # Output is deterministic at temperature 0, so retrying would return the same text
+            print("Model did not return valid JSON:", content)
+            return None
+        store_cached_recommendation(cache_key, recommendation)
+        return recommendation
     return None
 
+def parse_survey_id(raw_id):
+    """
+    Parse a survey ID from the URL, rejecting values outside the 64-bit
+    integer range orjson can serialize.
+    """
+    survey_id = int(raw_id)
+    if not -2**63 <= survey_id < 2**64:
+        raise ValueError(f"Survey ID out of range: {survey_id}")
+    return survey_id
+
+def json_response(data, status=200):
+    """
+    Build a JSON response serialized with orjson.
+    """
+    return Response(orjson.dumps(data), status=status, mimetype='application/json')
+
+def format_event(data):
+    """Format a payload as a compact 'data: <json>' stream event, already encoded to bytes"""
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
+# Stream events whose content never changes, encoded once at import
+FETCHING_EVENT = format_event({'type': 'status', 'message': 'Fetching survey data...'})
+PROCESSING_COMPLETE_EVENT = format_event({'type': 'status', 'message': 'Processing complete!'})
+POSITIVE_ASSESSMENT_EVENT = format_event({'type': 'status', 'message': 'Generating positive assessment via LLM...'})
+END_EVENT = format_event({'type': 'end'})
+
+def format_error_event(error):
+    """
+    Encode an exception raised while processing a survey as an error event.
+    """
+    if isinstance(error, requests.exceptions.RequestException):
+        return format_event({'type': 'error', 'message': f"Request failed: {str(error)}"})
+    return format_event({'type': 'error', 'message': f"Processing error: {str(error)}"})
+
+def stream_survey_events(survey_id, refresh=False):
+    """
+    Fetch a survey and yield its events, replaying a recent complete run of the
+    same survey content from cache instead of re-running the LLM pipeline.
+    With refresh set the cache is skipped and the new run replaces this
+    worker's entry.
+    """
+    # Send initial status
+    yield format_event({'type': 'status', 'message': 'Starting survey processing...', 'survey_id': survey_id})
+    
+    # Fetch survey data
+    yield FETCHING_EVENT
+    
+    try:
+        payload = fetch_survey_payload(survey_id)
+        cache_key = get_survey_cache_key(survey_id, payload)
+    except Exception as e:
+        yield format_error_event(e)
+        yield END_EVENT
+        return
+
+    if not refresh:
+        cached_events = survey_events_cache.get(cache_key)
+        if cached_events is not None:
+            yield from cached_events
+            return
+
+    events = []
+    outcome = {"cacheable": False}
+    for event in generate_survey_events(survey_id, payload, outcome):
+        events.append(event)
+        yield event
+
+    if outcome["cacheable"]:
+        survey_events_cache.set(cache_key, events)
+
+def generate_survey_events(survey_id, payload, outcome):
+    """
+    Process a fetched survey and yield progress, recommendations and a summary
+    as 'data: <json>' events as they are generated.
+
+    Sets outcome["cacheable"] once the run finishes without warnings or
+    failed recommendations.
+    """
+    try:
+        api_status = f"API Status - Task: {payload['task_status']}, Meta: {payload['meta_status']}"
+        yield format_event({'type': 'status', 'message': api_status})
+        
+        for warning in payload["warnings"]:
+            yield format_event({'type': 'warning', 'message': warning})
+        
+        # Send user context
+        category_scores = payload["category_scores"]
+        user_context = {
+            "survey_id": survey_id,
+            "assessment_date": datetime.now().strftime("%Y-%m-%d"),
+            "current_maturity_scores": category_scores,
+            "overall_maturity_level": calculate_overall_maturity(category_scores)
+        }
+        
+        yield format_event({'type': 'user_context', 'data': user_context})
+        
+        # Process tasks and generate recommendations
+        tasks = payload["tasks"]
+        category_scores_json = format_category_scores(category_scores)
+        # Only count tasks with scores 0, 1, 2 (skip good maturity levels 3, 4, 5)
+        eligible_tasks = list(iter_low_score_tasks(tasks))
+        total_tasks = len(eligible_tasks)
+        processed_tasks = 0
+        
+        yield format_event({'type': 'status', 'message': f'Processing {total_tasks} tasks...'})
+        
+        recommendations = []
+        failed_tasks = 0
+        
+        # Generate recommendations concurrently and stream them as they complete
+        futures = [
+            llm_executor.submit(generate_subcategory_recommendation, task, score, category_scores_json, survey_id)
+            for task, score in eligible_tasks
+        ]
+        try:
+            for future in as_completed(futures):
+                processed_tasks += 1
+                
+                # Send progress update
+                progress = {
+                    'type': 'progress',
+                    'current': processed_tasks,
+                    'total': total_tasks,
+                    'percentage': round((processed_tasks / total_tasks) * 100, 1)
+                }
+                yield format_event(progress)
+                
+                recommendation = future.result()
+                if recommendation:
+                    recommendations.append(recommendation)
+                    # Send individual recommendation
+                    yield format_event({'type': 'recommendation', 'data': recommendation})
+                else:
+                    failed_tasks += 1
+        finally:
+            # Drop queued work if the client disconnects before the stream finishes
+            for future in futures:
+                future.cancel()
+        
+        # Send completion status
+        yield PROCESSING_COMPLETE_EVENT
+        
+        # Check if no recommendations were generated and generate positive assessment
+        if not recommendations:
+            yield POSITIVE_ASSESSMENT_EVENT
+            positive_assessment = generate_positive_assessment_recommendation(category_scores, survey_id)
+            if positive_assessment:
+                recommendations = [positive_assessment]
+                yield format_event({'type': 'recommendation', 'data': positive_assessment})
+        
+        # Send final summary
+        final_summary = {
+            'type': 'summary',
+            'total_recommendations': len(recommendations),
+            'survey_id': survey_id,
+            'timestamp': datetime.now().isoformat()
+        }
+        yield format_event(final_summary)
+        
+        outcome["cacheable"] = not payload["warnings"] and not failed_tasks and bool(recommendations)
+        
+    except Exception as e:
+        yield format_error_event(e)
+    
+    # Send end marker
+    yield END_EVENT
+
 @app.route('/')
 def home():
     return "NIST 2.0 Recommendation Engine API is running"
@@ -744,310 +1077,40 @@ def home():
 @app.route('/process_survey/<survey_id>')
 def process_survey_endpoint(survey_id):
     try:
-        survey_id = int(survey_id)
+        survey_id = parse_survey_id(survey_id)
         result = process_survey(survey_id)
-        return jsonify(result)
+        return json_response(result)
     except ValueError:
-        return jsonify({"error": "Invalid survey ID. Must be a number."}), 400
+        return json_response({"error": "Invalid survey ID. Must be a number."}, status=400)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, status=500)
 
 @app.route('/process_survey_stream/<survey_id>')
 def process_survey_stream_endpoint(survey_id):
     """Streaming endpoint that yields recommendations as they are generated"""
     try:
-        survey_id = int(survey_id)
-        
-        def generate():
-            """Generator function that yields streaming data"""
-            # Send initial status
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Starting survey processing...', 'survey_id': survey_id})}\n\n"
-            
-            # Fetch survey data
-            task_url = f"{base_url}/surveyTasks?surveyId={survey_id}"
-            meta_url = f"{base_url}/survey?surveyId={survey_id}"
-            
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Fetching survey data...'})}\n\n"
-            
-            try:
-                # Send both requests using session
-                task_resp = session.get(task_url, headers=headers, timeout=30)
-                meta_resp = session.get(meta_url, headers=headers, timeout=30)
-                
-                yield f"data: {json.dumps({'type': 'status', 'message': f'API Status - Task: {task_resp.status_code}, Meta: {meta_resp.status_code}'})}\n\n"
-                
-                task_data, meta_data = {}, {}
-                
-                # Handle meta response
-                if meta_resp.status_code == 200 and meta_resp.text.strip():
-                    try:
-                        meta_data = meta_resp.json()
-                        if isinstance(meta_data.get("scores"), str):
-                            try:
-                                meta_data["scores"] = json.loads(meta_data["scores"])
-                            except json.JSONDecodeError:
-                                yield f"data: {json.dumps({'type': 'warning', 'message': 'Could not parse scores data'})}\n\n"
-                                meta_data["scores"] = {}
-                    except json.JSONDecodeError as e:
-                        yield f"data: {json.dumps({'type': 'warning', 'message': f'Meta JSON error: {str(e)}'})}\n\n"
-                else:
-                    yield f"data: {json.dumps({'type': 'warning', 'message': 'Empty or non-JSON meta response'})}\n\n"
-                
-                # Handle task response
-                if task_resp.status_code == 200 and task_resp.text.strip():
-                    try:
-                        task_data = task_resp.json()
-                    except json.JSONDecodeError as e:
-                        yield f"data: {json.dumps({'type': 'warning', 'message': f'Task JSON error: {str(e)}'})}\n\n"
-                else:
-                    yield f"data: {json.dumps({'type': 'warning', 'message': 'Empty or non-JSON task response'})}\n\n"
-                
-                # Create survey data
-                survey_data = {
-                    "survey_id": survey_id,
-                    "meta": meta_data,
-                    "tasks": task_data
-                }
-                
-                # Send user context
-                category_scores = survey_data.get("meta", {}).get("scores", {})
-                user_context = {
-                    "survey_id": survey_id,
-                    "assessment_date": datetime.now().strftime("%Y-%m-%d"),
-                    "current_maturity_scores": category_scores,
-                    "overall_maturity_level": calculate_overall_maturity(category_scores)
-                }
-                
-                yield f"data: {json.dumps({'type': 'user_context', 'data': user_context})}\n\n"
-                
-                # Process tasks and generate recommendations
-                tasks = survey_data.get("tasks", {}).get("tasks", [])
-                # Only count tasks with scores 0, 1, 2 (skip good maturity levels 3, 4, 5)
-                total_tasks = len([task for task in tasks if task.get("score") is not None and int(task.get("score", 0)) <= 2])
-                processed_tasks = 0
-                
-                yield f"data: {json.dumps({'type': 'status', 'message': f'Processing {total_tasks} tasks...'})}\n\n"
-                
-                recommendations = []
-                
-                for task in tasks:
-                    if task.get("score") is not None:
-                        score = int(task.get("score", 0))
-                        # Skip recommendation generation for scores 3, 4, 5 (good maturity levels)
-                        if score <= 2:
-                            processed_tasks += 1
-                            
-                            # Send progress update
-                            progress = {
-                                'type': 'progress',
-                                'current': processed_tasks,
-                                'total': total_tasks,
-                                'percentage': round((processed_tasks / total_tasks) * 100, 1)
-                            }
-                            yield f"data: {json.dumps(progress)}\n\n"
-                            
-                            # Generate recommendation for this task
-                            recommendation = generate_subcategory_recommendation(
-                                task,
-                                category_scores,
-                                survey_id
-                            )
-                            
-                            if recommendation:
-                                recommendations.append(recommendation)
-                                # Send individual recommendation
-                                yield f"data: {json.dumps({'type': 'recommendation', 'data': recommendation})}\n\n"
-                            
-                            # Small delay to prevent overwhelming the client
-                            time.sleep(0.1)
-                
-                # Send completion status
-                yield f"data: {json.dumps({'type': 'status', 'message': 'Processing complete!'})}\n\n"
-                
-                # Check if no recommendations were generated and generate positive assessment
-                if not recommendations:
-                    yield f"data: {json.dumps({'type': 'status', 'message': 'Generating positive assessment via LLM...'})}\n\n"
-                    positive_assessment = generate_positive_assessment_recommendation(category_scores, survey_id)
-                    if positive_assessment:
-                        recommendations = [positive_assessment]
-                        yield f"data: {json.dumps({'type': 'recommendation', 'data': positive_assessment})}\n\n"
-                
-                # Send final summary
-                final_summary = {
-                    'type': 'summary',
-                    'total_recommendations': len(recommendations),
-                    'survey_id': survey_id,
-                    'timestamp': datetime.now().isoformat()
-                }
-                yield f"data: {json.dumps(final_summary)}\n\n"
-                
-            except requests.exceptions.RequestException as e:
-                error_msg = f"Request failed: {str(e)}"
-                yield f"data: {json.dumps({'type': 'error', 'message': error_msg})}\n\n"
-            except Exception as e:
-                error_msg = f"Processing error: {str(e)}"
-                yield f"data: {json.dumps({'type': 'error', 'message': error_msg})}\n\n"
-            
-            # Send end marker
-            yield f"data: {json.dumps({'type': 'end'})}\n\n"
-        
-        return Response(generate(), mimetype='text/plain')
-        
+        survey_id = parse_survey_id(survey_id)
+        return Response(stream_survey_events(survey_id, refresh=request.args.get('refresh') == '1'), mimetype='text/plain', direct_passthrough=True)
     except ValueError:
-        return jsonify({"error": "Invalid survey ID. Must be a number."}), 400
+        return json_response({"error": "Invalid survey ID. Must be a number."}, status=400)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, status=500)
 
 @app.route('/process_survey_sse/<survey_id>')
 def process_survey_sse_endpoint(survey_id):
     """Server-Sent Events endpoint for real-time streaming to web clients"""
     try:
-        survey_id = int(survey_id)
-        
-        def generate():
-            """Generator function that yields SSE data"""
-            # Send initial status
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Starting survey processing...', 'survey_id': survey_id})}\n\n"
-            
-            # Fetch survey data
-            task_url = f"{base_url}/surveyTasks?surveyId={survey_id}"
-            meta_url = f"{base_url}/survey?surveyId={survey_id}"
-            
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Fetching survey data...'})}\n\n"
-            
-            try:
-                # Send both requests using session
-                task_resp = session.get(task_url, headers=headers, timeout=30)
-                meta_resp = session.get(meta_url, headers=headers, timeout=30)
-                
-                yield f"data: {json.dumps({'type': 'status', 'message': f'API Status - Task: {task_resp.status_code}, Meta: {meta_resp.status_code}'})}\n\n"
-                
-                task_data, meta_data = {}, {}
-                
-                # Handle meta response
-                if meta_resp.status_code == 200 and meta_resp.text.strip():
-                    try:
-                        meta_data = meta_resp.json()
-                        if isinstance(meta_data.get("scores"), str):
-                            try:
-                                meta_data["scores"] = json.loads(meta_data["scores"])
-                            except json.JSONDecodeError:
-                                yield f"data: {json.dumps({'type': 'warning', 'message': 'Could not parse scores data'})}\n\n"
-                                meta_data["scores"] = {}
-                    except json.JSONDecodeError as e:
-                        yield f"data: {json.dumps({'type': 'warning', 'message': f'Meta JSON error: {str(e)}'})}\n\n"
-                else:
-                    yield f"data: {json.dumps({'type': 'warning', 'message': 'Empty or non-JSON meta response'})}\n\n"
-                
-                # Handle task response
-                if task_resp.status_code == 200 and task_resp.text.strip():
-                    try:
-                        task_data = task_resp.json()
-                    except json.JSONDecodeError as e:
-                        yield f"data: {json.dumps({'type': 'warning', 'message': f'Task JSON error: {str(e)}'})}\n\n"
-                else:
-                    yield f"data: {json.dumps({'type': 'warning', 'message': 'Empty or non-JSON task response'})}\n\n"
-                
-                # Create survey data
-                survey_data = {
-                    "survey_id": survey_id,
-                    "meta": meta_data,
-                    "tasks": task_data
-                }
-                
-                # Send user context
-                category_scores = survey_data.get("meta", {}).get("scores", {})
-                user_context = {
-                    "survey_id": survey_id,
-                    "assessment_date": datetime.now().strftime("%Y-%m-%d"),
-                    "current_maturity_scores": category_scores,
-                    "overall_maturity_level": calculate_overall_maturity(category_scores)
-                }
-                
-                yield f"data: {json.dumps({'type': 'user_context', 'data': user_context})}\n\n"
-                
-                # Process tasks and generate recommendations
-                tasks = survey_data.get("tasks", {}).get("tasks", [])
-                # Only count tasks with scores 0, 1, 2 (skip good maturity levels 3, 4, 5)
-                total_tasks = len([task for task in tasks if task.get("score") is not None and int(task.get("score", 0)) <= 2])
-                processed_tasks = 0
-                
-                yield f"data: {json.dumps({'type': 'status', 'message': f'Processing {total_tasks} tasks...'})}\n\n"
-                
-                recommendations = []
-                
-                for task in tasks:
-                    if task.get("score") is not None:
-                        score = int(task.get("score", 0))
-                        # Skip recommendation generation for scores 3, 4, 5 (good maturity levels)
-                        if score <= 2:
-                            processed_tasks += 1
-                            
-                            # Send progress update
-                            progress = {
-                                'type': 'progress',
-                                'current': processed_tasks,
-                                'total': total_tasks,
-                                'percentage': round((processed_tasks / total_tasks) * 100, 1)
-                            }
-                            yield f"data: {json.dumps(progress)}\n\n"
-                            
-                            # Generate recommendation for this task
-                            recommendation = generate_subcategory_recommendation(
-                                task,
-                                category_scores,
-                                survey_id
-                            )
-                            
-                            if recommendation:
-                                recommendations.append(recommendation)
-                                # Send individual recommendation
-                                yield f"data: {json.dumps({'type': 'recommendation', 'data': recommendation})}\n\n"
-                            
-                            # Small delay to prevent overwhelming the client
-                            time.sleep(0.1)
-                
-                # Send completion status
-                yield f"data: {json.dumps({'type': 'status', 'message': 'Processing complete!'})}\n\n"
-                
-                # Check if no recommendations were generated and generate positive assessment
-                if not recommendations:
-                    yield f"data: {json.dumps({'type': 'status', 'message': 'Generating positive assessment via LLM...'})}\n\n"
-                    positive_assessment = generate_positive_assessment_recommendation(category_scores, survey_id)
-                    if positive_assessment:
-                        recommendations = [positive_assessment]
-                        yield f"data: {json.dumps({'type': 'recommendation', 'data': positive_assessment})}\n\n"
-                
-                # Send final summary
-                final_summary = {
-                    'type': 'summary',
-                    'total_recommendations': len(recommendations),
-                    'survey_id': survey_id,
-                    'timestamp': datetime.now().isoformat()
-                }
-                yield f"data: {json.dumps(final_summary)}\n\n"
-                
-            except requests.exceptions.RequestException as e:
-                error_msg = f"Request failed: {str(e)}"
-                yield f"data: {json.dumps({'type': 'error', 'message': error_msg})}\n\n"
-            except Exception as e:
-                error_msg = f"Processing error: {str(e)}"
-                yield f"data: {json.dumps({'type': 'error', 'message': error_msg})}\n\n"
-            
-            # Send end marker
-            yield f"data: {json.dumps({'type': 'end'})}\n\n"
-        
-        return Response(generate(), mimetype='text/event-stream', headers={
+        survey_id = parse_survey_id(survey_id)
+        return Response(stream_survey_events(survey_id, refresh=request.args.get('refresh') == '1'), mimetype='text/event-stream', direct_passthrough=True, headers={
             'Cache-Control': 'no-cache',
             'Connection': 'keep-alive',
             'Access-Control-Allow-Origin': '*',
             'Access-Control-Allow-Headers': 'Cache-Control'
         })
-        
     except ValueError:
-        return jsonify({"error": "Invalid survey ID. Must be a number."}), 400
+        return json_response({"error": "Invalid survey ID. Must be a number."}, status=400)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, status=500)
 
 if __name__ == "__main__":
     print("Starting NIST 2.0 Recommendation Engine API on http://localhost:5000")
@@ -1055,4 +1118,5 @@ if __name__ == "__main__":
     print("  GET /process_survey/<survey_id> - Process survey and return complete result")
     print("  GET /process_survey_stream/<survey_id> - Stream recommendations as they're generated")
     print("  GET /process_survey_sse/<survey_id> - Server-Sent Events for real-time web streaming")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Development server only; production runs under gunicorn with gevent workers (see Procfile)
+    app.run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')